@@ -1,10 +1,19 @@
 import os
+import re
+import logging
 import asyncio
 import argparse
+import secrets
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, UTC, timedelta
+from aiohttp import web
 from aiogram import Bot, Dispatcher, F
+from aiogram.client.default import DefaultBotProperties
 from aiogram.filters import Command
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiogram.types import (
     Message,
     CallbackQuery,
@@ -14,6 +23,8 @@ from aiogram.types import (
 from db import init_db, get_new_aparts
 from dotenv import load_dotenv
 
+logger = logging.getLogger("parserbot")
+
 
 def parse_arguments():
     """
@@ -38,6 +49,9 @@ def parse_arguments():
 
   # Использование альтернативного .env файла
   python bot.py --env-file /path/to/.env
+
+  # Получение обновлений через webhook вместо long polling
+  python bot.py --mode webhook --webhook-url "https://bot.example.com" --webhook-port 8080
         """
     )
 
@@ -74,6 +88,24 @@ def parse_arguments():
         help='Максимальное количество объявлений за один запрос (по умолчанию: 100)'
     )
 
+    parser.add_argument(
+        '--mode',
+        choices=['polling', 'webhook'],
+        help='Режим получения обновлений (переопределяет BOT_MODE из .env, по умолчанию: polling)'
+    )
+
+    parser.add_argument(
+        '--webhook-url',
+        type=str,
+        help='Публичный адрес бота для режима webhook (переопределяет WEBHOOK_URL из .env)'
+    )
+
+    parser.add_argument(
+        '--webhook-port',
+        type=int,
+        help='Порт HTTP-сервера для режима webhook (переопределяет WEBHOOK_PORT из .env, по умолчанию: 8080)'
+    )
+
     return parser.parse_args()
 
 
@@ -82,10 +114,17 @@ CONFIG = {
     'db_url': None,
     'check_interval': 30,
     'search_limit': 100,
+    'mode': 'polling',
+    'webhook_url': None,
+    'webhook_port': 8080,
 }
 
 
-@dataclass
+# Не более OUTBOX_SIZE неотправленных объявлений в очереди одного чата
+OUTBOX_SIZE = 200
+
+
+@dataclass(slots=True)
 class UserState:
     """
     Хранит состояние одного пользователя бота:
@@ -99,38 +138,78 @@ class UserState:
     :type max_price: int | None
     :ivar waiting_for_rooms: Ожидается ли ввод количества комнат.
     :type waiting_for_rooms: bool
-    :ivar rooms: Список выбранных вариантов комнат (0 = студия).
-    :type rooms: list[int] | None
+    :ivar rooms: Множество выбранных вариантов комнат (0 = студия).
+    :type rooms: frozenset[int] | None
     :ivar searching: Признак активного фонового поиска объявлений.
     :type searching: bool
     :ivar since: Метка времени, начиная с которой ищутся новые объявления.
     :type since: datetime | None
+    :ivar outbox: Очередь объявлений, ожидающих отправки в чат; создаётся
+        при первом запуске поиска.
+    :type outbox: asyncio.Queue[dict] | None
+    :ivar scheduled: Стоит ли чат в очереди ready_chats на отправку.
+    :type scheduled: bool
     """
     waiting_for_price: bool = False
     min_price: int | None = None
     max_price: int | None = None
     waiting_for_rooms: bool = False
-    rooms: list[int] | None = None
+    rooms: frozenset[int] | None = None
     searching: bool = False
     since: datetime | None = None
+    outbox: asyncio.Queue[dict] | None = None
+    scheduled: bool = False
 
 
-user_states: dict[int, UserState] = {}
+# Не более MAX_USER_STATES состояний; давно не обращавшиеся чаты
+# без активного поиска вытесняются первыми
+MAX_USER_STATES = 10_000
+user_states: OrderedDict[int, UserState] = OrderedDict()
+# Пользователи с активным поиском, которым рассылаются новые объявления
+subscribers: dict[int, UserState] = {}
+
+# Будит dispatcher_loop до истечения check_interval, например при запуске поиска
+dispatcher_wakeup = asyncio.Event()
+
+# Разбор пользовательского ввода фильтров
+_PRICE_RE = re.compile(r"(\d+)?-?(\d+)?")
+_ROOMS_RE = re.compile(r"\d+")
+
+# Чаты с непустой очередью outbox, ожидающие обработчика отправки;
+# число обработчиков ограничивает одновременные send_message по всем чатам
+ready_chats: asyncio.Queue[tuple[int, UserState]] = asyncio.Queue()
+SENDER_WORKERS = 8
+
+# Текст сообщения с объявлением; заполняется через format_map(ad)
+_AD_TMPL = "Цена: {price} ₽\nКомнат: {rooms}\n{title}\n{link}"
 
 
 def get_state(chat_id: int) -> UserState:
     """
     Возвращает состояние пользователя по chat_id,
-    создавая его при первом обращении.
+    создавая его при первом обращении. Если состояний становится больше
+    MAX_USER_STATES, удаляется самое давнее состояние без активного поиска.
 
     :param chat_id: Идентификатор чата Telegram.
     :type chat_id: int
     :returns: Объект состояния пользователя для данного чата.
     :rtype: UserState
     """
-    if chat_id not in user_states:
-        user_states[chat_id] = UserState()
-    return user_states[chat_id]
+    state = user_states.get(chat_id)
+    if state is not None:
+        user_states.move_to_end(chat_id)
+        return state
+
+    state = UserState()
+    user_states[chat_id] = state
+
+    if len(user_states) > MAX_USER_STATES:
+        for old_id, old_state in user_states.items():
+            if old_id != chat_id and not old_state.searching:
+                del user_states[old_id]
+                break
+
+    return state
 
 
 def main_keyboard(state: UserState) -> InlineKeyboardMarkup:
@@ -144,19 +223,44 @@ def main_keyboard(state: UserState) -> InlineKeyboardMarkup:
     :returns: Объект inline-клавиатуры для главного меню.
     :rtype: InlineKeyboardMarkup
     """
-    if state.min_price or state.max_price:
+    return _build_main_keyboard(state.min_price, state.max_price, state.rooms)
+
+
+@lru_cache(maxsize=1024)
+def _build_main_keyboard(
+    min_price: int | None,
+    max_price: int | None,
+    rooms: frozenset[int] | None,
+) -> InlineKeyboardMarkup:
+    """
+    Строит основную клавиатуру по значениям фильтров. Результат зависит
+    только от аргументов, поэтому кэшируется и разделяется между чатами
+    с одинаковыми фильтрами. Модели aiogram изменяемы, поэтому
+    возвращённую клавиатуру нельзя модифицировать: изменение попадёт
+    во все чаты с теми же фильтрами.
+
+    :param min_price: Минимальная цена фильтра, если задана.
+    :type min_price: int | None
+    :param max_price: Максимальная цена фильтра, если задана.
+    :type max_price: int | None
+    :param rooms: Выбранные варианты комнат (0 = студия), если заданы.
+    :type rooms: frozenset[int] | None
+    :returns: Объект inline-клавиатуры для главного меню.
+    :rtype: InlineKeyboardMarkup
+    """
+    if min_price or max_price:
         parts = []
-        if state.min_price:
-            parts.append(f"от {state.min_price}")
-        if state.max_price:
-            parts.append(f"до {state.max_price}")
+        if min_price:
+            parts.append(f"от {min_price}")
+        if max_price:
+            parts.append(f"до {max_price}")
         price_text = "💲 Цена: " + " ".join(parts)
     else:
         price_text = "💲 Установить цену"
 
-    if state.rooms:
+    if rooms:
         rooms_str = ", ".join(
-            ["студия" if r == 0 else f"{r}" for r in state.rooms]
+            ["студия" if r == 0 else f"{r}" for r in sorted(rooms)]
         )
         rooms_text = "🏠 Комнаты: " + rooms_str
     else:
@@ -170,9 +274,12 @@ def main_keyboard(state: UserState) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
 
+@lru_cache(maxsize=1)
 def stop_keyboard() -> InlineKeyboardMarkup:
     """
-    Строит inline-клавиатуру с одной кнопкой для остановки поиска.
+    Возвращает inline-клавиатуру с одной кнопкой для остановки поиска.
+    Клавиатура неизменна, поэтому строится один раз; возвращённый
+    объект общий для всех чатов и не должен модифицироваться.
 
     :returns: Клавиатура с кнопкой «Остановить поиск».
     :rtype: InlineKeyboardMarkup
@@ -184,6 +291,38 @@ def stop_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+def parse_price_range(text: str) -> tuple[int | None, int | None]:
+    """
+    Разбирает введённый пользователем диапазон цены вида ``"30000-60000"``,
+    ``"40000"`` или ``"-60000"``. Пробелы внутри чисел допускаются.
+
+    :param text: Текст сообщения пользователя.
+    :type text: str
+    :returns: Кортеж (минимальная цена, максимальная цена); отсутствующая
+        или некорректная граница равна None.
+    :rtype: tuple[int | None, int | None]
+    """
+    m = _PRICE_RE.fullmatch(text.replace(" ", ""))
+    if not m:
+        return None, None
+    min_p = int(m[1]) if m[1] else None
+    max_p = int(m[2]) if m[2] else None
+    return min_p, max_p
+
+
+def parse_rooms(text: str) -> list[int]:
+    """
+    Разбирает введённый пользователем список комнат вида ``"0,1,2"``
+    (0 = студия), извлекая из текста все целые числа.
+
+    :param text: Текст сообщения пользователя.
+    :type text: str
+    :returns: Список вариантов количества комнат, возможно пустой.
+    :rtype: list[int]
+    """
+    return [int(x) for x in _ROOMS_RE.findall(text)]
+
+
 async def cmd_start(message: Message):
     """
     Обрабатывает команду /start и отправляет приветственное сообщение
@@ -200,82 +339,139 @@ async def cmd_start(message: Message):
         )
         await message.answer(text, reply_markup=main_keyboard(state))
     except Exception as e:
-        print(f"[cmd_start] Ошибка: {e}")
+        logger.exception("[cmd_start] Ошибка: %s", e)
         try:
             await message.answer("Произошла ошибка. Попробуйте позже.")
         except Exception:
             pass
 
 
-async def on_callback(callback: CallbackQuery, bot: Bot):
+async def _handle_set_price(callback: CallbackQuery, bot: Bot, state: UserState):
     """
-    Обрабатывает нажатия на inline-кнопки в основном меню бота.
-    В зависимости от callback_data переводит пользователя в режим
-    ввода цены или комнат, запускает или останавливает поиск.
+    Переводит пользователя в режим ввода диапазона цены.
 
     :param callback: Объект callback-запроса от Telegram.
     :type callback: CallbackQuery
     :param bot: Экземпляр бота для отправки сообщений.
     :type bot: Bot
+    :param state: Состояние пользователя.
+    :type state: UserState
     """
-    try:
-        chat_id = callback.message.chat.id
-        state = get_state(chat_id)
+    state.waiting_for_price = True
+    state.waiting_for_rooms = False
+    await callback.message.answer(
+        "Введи диапазон цены, например:\n"
+        "30000-60000\n"
+        "Или только минимум, например:\n"
+        "40000"
+    )
+    await callback.answer()
 
-        if callback.data == "set_price":
-            state.waiting_for_price = True
-            state.waiting_for_rooms = False
-            await callback.message.answer(
-                "Введи диапазон цены, например:\n"
-                "30000-60000\n"
-                "Или только минимум, например:\n"
-                "40000"
-            )
-            await callback.answer()
-            return
 
-        if callback.data == "set_rooms":
-            state.waiting_for_rooms = True
-            state.waiting_for_price = False
-            await callback.message.answer(
-                "Введи список комнат через запятую.\n"
-                "Примеры:\n"
-                "студия и 1-2к: 0,1,2\n"
-                "только 2 и 3к: 2,3"
-            )
-            await callback.answer()
-            return
+async def _handle_set_rooms(callback: CallbackQuery, bot: Bot, state: UserState):
+    """
+    Переводит пользователя в режим ввода количества комнат.
+
+    :param callback: Объект callback-запроса от Telegram.
+    :type callback: CallbackQuery
+    :param bot: Экземпляр бота для отправки сообщений.
+    :type bot: Bot
+    :param state: Состояние пользователя.
+    :type state: UserState
+    """
+    state.waiting_for_rooms = True
+    state.waiting_for_price = False
+    await callback.message.answer(
+        "Введи список комнат через запятую.\n"
+        "Примеры:\n"
+        "студия и 1-2к: 0,1,2\n"
+        "только 2 и 3к: 2,3"
+    )
+    await callback.answer()
+
+
+async def _handle_start_search(callback: CallbackQuery, bot: Bot, state: UserState):
+    """
+    Запускает поиск: добавляет пользователя в subscribers
+    и будит общий цикл рассылки.
+
+    :param callback: Объект callback-запроса от Telegram.
+    :type callback: CallbackQuery
+    :param bot: Экземпляр бота для отправки сообщений.
+    :type bot: Bot
+    :param state: Состояние пользователя.
+    :type state: UserState
+    """
+    if state.searching:
+        await callback.answer("Поиск уже запущен", show_alert=True)
+        return
+
+    state.searching = True
+    state.since = datetime.now(UTC) - timedelta(minutes=4)
+    # Очередь нужна только искавшим чатам: у остальных состояние остаётся лёгким
+    if state.outbox is None:
+        state.outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+    subscribers[callback.message.chat.id] = state
+    dispatcher_wakeup.set()
+    await callback.message.answer(
+        "Поиск запущен.\n"
+        "Будут приходить новые объявления.",
+        reply_markup=stop_keyboard()
+    )
+    await callback.answer()
+
+
+async def _handle_stop_search(callback: CallbackQuery, bot: Bot, state: UserState):
+    """
+    Останавливает поиск и убирает пользователя из subscribers.
+
+    :param callback: Объект callback-запроса от Telegram.
+    :type callback: CallbackQuery
+    :param bot: Экземпляр бота для отправки сообщений.
+    :type bot: Bot
+    :param state: Состояние пользователя.
+    :type state: UserState
+    """
+    if not state.searching:
+        await callback.answer("Поиск уже остановлен")
+        return
+
+    state.searching = False
+    subscribers.pop(callback.message.chat.id, None)
+    await callback.message.answer("Поиск остановлен.")
+    await callback.answer()
+
+
+# Обработчики inline-кнопок по значению callback_data
+_HANDLERS: dict[str, Callable[[CallbackQuery, Bot, UserState], Awaitable[None]]] = {
+    "set_price": _handle_set_price,
+    "set_rooms": _handle_set_rooms,
+    "start_search": _handle_start_search,
+    "stop_search": _handle_stop_search,
+}
 
-        if callback.data == "start_search":
-            if state.searching:
-                await callback.answer("Поиск уже запущен", show_alert=True)
-                return
-
-            state.searching = True
-            state.since = datetime.now(UTC) - timedelta(minutes=4)
-            await callback.message.answer(
-                "Поиск запущен.\n"
-                "Будут приходить новые объявления.",
-                reply_markup=stop_keyboard()
-            )
-            await callback.answer()
-            asyncio.create_task(search_loop(bot, chat_id))
-            return
 
-        if callback.data == "stop_search":
-            if not state.searching:
-                await callback.answer("Поиск уже остановлен")
-                return
+async def on_callback(callback: CallbackQuery, bot: Bot):
+    """
+    Обрабатывает нажатия на inline-кнопки в основном меню бота.
+    По callback_data выбирает обработчик из _HANDLERS: переход в режим
+    ввода цены или комнат, запуск или остановка поиска.
 
-            state.searching = False
-            await callback.message.answer("Поиск остановлен.")
-            await callback.answer()
+    :param callback: Объект callback-запроса от Telegram.
+    :type callback: CallbackQuery
+    :param bot: Экземпляр бота для отправки сообщений.
+    :type bot: Bot
+    """
+    try:
+        handler = _HANDLERS.get(callback.data)
+        if handler is None:
+            await callback.answer("Неизвестная команда")
             return
 
-        await callback.answer("Неизвестная команда")
+        await handler(callback, bot, get_state(callback.message.chat.id))
 
     except Exception as e:
-        print(f"[on_callback] Ошибка: {e}")
+        logger.exception("[on_callback] Ошибка: %s", e)
         try:
             await callback.answer("Произошла ошибка", show_alert=True)
         except Exception:
@@ -301,30 +497,7 @@ async def on_message(message: Message):
 
         if state.waiting_for_price:
             try:
-                raw = message.text.replace(" ", "")
-                min_p = None
-                max_p = None
-
-                if "-" in raw:
-                    left, right = raw.split("-", maxsplit=1)
-                    if left:
-                        try:
-                            min_p = int(left)
-                        except ValueError:
-                            min_p = None
-                    if right:
-                        try:
-                            max_p = int(right)
-                        except ValueError:
-                            max_p = None
-                else:
-                    try:
-                        min_p = int(raw)
-                    except ValueError:
-                        min_p = None
-
-                state.min_price = min_p
-                state.max_price = max_p
+                state.min_price, state.max_price = parse_price_range(message.text)
                 state.waiting_for_price = False
 
                 await message.answer(
@@ -334,31 +507,18 @@ async def on_message(message: Message):
                     reply_markup=main_keyboard(state),
                 )
             except Exception as e:
-                print(f"[on_message] Ошибка обработки цены: {e}")
+                logger.exception("[on_message] Ошибка обработки цены: %s", e)
                 await message.answer("Ошибка обработки. Попробуйте снова.")
             return
 
         if state.waiting_for_rooms:
             try:
-                raw = message.text.replace(" ", "")
-                rooms_list: list[int] = []
-
-                if raw:
-                    for part in raw.split(","):
-                        if not part:
-                            continue
-                        try:
-                            val = int(part)
-                            rooms_list.append(val)
-                        except ValueError:
-                            continue
-
-                state.rooms = rooms_list or None
+                state.rooms = frozenset(parse_rooms(message.text)) or None
                 state.waiting_for_rooms = False
 
                 if state.rooms:
                     rooms_str = ", ".join(
-                        ["студия" if r == 0 else f"{r}" for r in state.rooms]
+                        ["студия" if r == 0 else f"{r}" for r in sorted(state.rooms)]
                     )
                     txt = f"Фильтр по комнатам обновлён.\nКомнаты: {rooms_str}"
                 else:
@@ -366,101 +526,260 @@ async def on_message(message: Message):
 
                 await message.answer(txt, reply_markup=main_keyboard(state))
             except Exception as e:
-                print(f"[on_message] Ошибка обработки комнат: {e}")
+                logger.exception("[on_message] Ошибка обработки комнат: %s", e)
                 await message.answer("Ошибка обработки. Попробуйте снова.")
             return
 
         await message.answer("Используй /start для начала.")
 
     except Exception as e:
-        print(f"[on_message] Критическая ошибка: {e}")
+        logger.exception("[on_message] Критическая ошибка: %s", e)
         try:
             await message.answer("Произошла ошибка. Попробуйте /start")
         except Exception:
             pass
 
 
-async def search_loop(bot: Bot, chat_id: int):
+def matches_filters(state: UserState, ad: dict) -> bool:
     """
-    Цикл фонового поиска новых объявлений для конкретного пользователя.
-    Периодически опрашивает базу данных на наличие новых объявлений,
-    соответствующих фильтрам пользователя, и отправляет их в чат.
+    Проверяет, подходит ли объявление под фильтры пользователя
+    по цене и количеству комнат.
+
+    :param state: Состояние пользователя с настройками фильтров.
+    :type state: UserState
+    :param ad: Объявление из БД с ключами price и rooms.
+    :type ad: dict
+    :returns: True, если объявление проходит все фильтры, иначе False.
+    :rtype: bool
+    """
+    if state.min_price is not None and ad["price"] < state.min_price:
+        return False
+    if state.max_price is not None and ad["price"] > state.max_price:
+        return False
+    if state.rooms and ad["rooms"] not in state.rooms:
+        return False
+    return True
+
+
+def enqueue_ads(chat_id: int, state: UserState, ads: list[dict], newest: datetime):
+    """
+    Кладёт в очередь outbox пользователя объявления из общей выборки,
+    подходящие под его фильтры и созданные после его метки since,
+    и сдвигает since. Если очередь переполнена, лишние объявления
+    отбрасываются. Чат с новыми объявлениями ставится в ready_chats,
+    если он ещё не ожидает обработчика отправки.
+
+    :param chat_id: Идентификатор чата пользователя.
+    :type chat_id: int
+    :param state: Состояние пользователя с фильтрами и меткой since.
+    :type state: UserState
+    :param ads: Общая выборка новых объявлений, отсортированная по created_at.
+    :type ads: list[dict]
+    :param newest: Самая поздняя метка created_at в выборке.
+    :type newest: datetime
+    """
+    queued = dropped = 0
+    for ad in ads:
+        if ad["created_at"] > state.since and matches_filters(state, ad):
+            try:
+                state.outbox.put_nowait(ad)
+                queued += 1
+            except asyncio.QueueFull:
+                dropped += 1
+
+    if dropped:
+        logger.warning(
+            "[dispatcher] Очередь чата %s переполнена, отброшено %d объявлений",
+            chat_id, dropped,
+        )
+
+    if queued and not state.scheduled:
+        state.scheduled = True
+        ready_chats.put_nowait((chat_id, state))
+
+    if newest > state.since:
+        state.since = newest
+
+
+async def send_outbox(bot: Bot, chat_id: int, state: UserState):
+    """
+    Отправляет пользователю по порядку все объявления из его очереди
+    outbox. Все сообщения, кроме последнего, отправляются без звука
+    и без клавиатуры остановки. Если поиск остановлен, оставшиеся
+    объявления отбрасываются.
 
     :param bot: Экземпляр бота для отправки сообщений.
     :type bot: Bot
     :param chat_id: Идентификатор чата пользователя.
     :type chat_id: int
+    :param state: Состояние пользователя с очередью outbox.
+    :type state: UserState
     """
-    state = get_state(chat_id)
+    while not state.outbox.empty():
+        ad = state.outbox.get_nowait()
+        if not state.searching:
+            continue
+        try:
+            text = _AD_TMPL.format_map(ad)
+            # Уведомление и кнопка остановки — только у последнего сообщения в очереди
+            if state.outbox.empty():
+                kw = {"reply_markup": stop_keyboard()}
+            else:
+                kw = {"disable_notification": True}
+            await bot.send_message(chat_id, text, **kw)
+        except Exception as e:
+            logger.warning("[sender] Ошибка отправки сообщения в чат %s: %s", chat_id, e)
+
+    # Между проверкой пустой очереди и сбросом флага нет await,
+    # поэтому enqueue_ads не может потерять новые объявления
+    state.scheduled = False
+
+
+async def sender_worker(bot: Bot):
+    """
+    Обработчик отправки: забирает из ready_chats чаты с непустой
+    очередью outbox и отправляет им объявления. Один чат в каждый
+    момент обслуживается только одним обработчиком, поэтому порядок
+    сообщений внутри чата сохраняется.
 
-    try:
-        if state.since is None:
-            state.since = datetime.now(UTC)
-        elif state.since.tzinfo is None:
-            state.since = state.since.replace(tzinfo=UTC)
+    :param bot: Экземпляр бота для отправки сообщений.
+    :type bot: Bot
+    """
+    while True:
+        chat_id, state = await ready_chats.get()
+        try:
+            await send_outbox(bot, chat_id, state)
+        except Exception as e:
+            state.scheduled = False
+            logger.exception("[sender] ошибка обработки чата %s: %s", chat_id, e)
 
-        print(f"[search_loop] СТАРТ для чата {chat_id}, since={state.since!r}")
-        print(f"[search_loop] Фильтры: min={state.min_price}, max={state.max_price}, rooms={state.rooms}")
 
-        while state.searching:
-            try:
-                ads = get_new_aparts(
-                    min_price=state.min_price,
-                    max_price=state.max_price,
-                    rooms=state.rooms,
-                    since=state.since,
-                    limit=CONFIG['search_limit'],
-                )
+async def dispatch_new_aparts():
+    """
+    Выполняет одну итерацию рассылки: общим для всех запросом выбирает
+    из БД объявления, созданные после самой ранней метки since среди
+    подписчиков, и раскладывает подходящие под фильтры по очередям
+    outbox пользователей. Если выборка упирается в search_limit,
+    запросы повторяются со сдвинутой меткой, пока накопившиеся
+    объявления не будут выбраны полностью. Чаты, чья метка since
+    раньше текущей метки выборки (поиск запущен во время запроса),
+    пропускаются и обслуживаются следующей итерацией.
+    """
+    cursor = min(state.since for state in subscribers.values())
+    limit = CONFIG['search_limit']
+
+    while subscribers:
+        # Запрос к БД блокирующий, поэтому выполняется вне цикла событий
+        ads = await asyncio.to_thread(
+            get_new_aparts,
+            min_price=None,
+            max_price=None,
+            rooms=None,
+            since=cursor,
+            limit=limit,
+        )
 
-                print(f"[search_loop] since={state.since!r}, найдено {len(ads)} объявлений")
+        logger.debug(
+            "[dispatcher] since=%r, найдено %d объявлений, подписчиков: %d",
+            cursor, len(ads), len(subscribers),
+        )
 
-                if len(ads) == CONFIG['search_limit']:
-                    print(f"[WARNING] Достигнут лимит {CONFIG['search_limit']}! Возможно есть еще объявления!")
+        if not ads:
+            break
 
-                if ads:
-                    for ad in ads:
-                        try:
-                            text = (
-                                f"Цена: {ad['price']} ₽\n"
-                                f"Комнат: {ad['rooms']}\n"
-                                f"{ad['title']}\n"
-                                f"{ad['link']}"
-                            )
-                            await bot.send_message(chat_id, text, reply_markup=stop_keyboard())
-                        except Exception as e:
-                            print(f"[search_loop] Ошибка отправки сообщения: {e}")
+        # Нормализация часового пояса и поиск самой поздней метки за один проход
+        newest = cursor
+        for ad in ads:
+            ts = ad["created_at"]
+            if ts.tzinfo is None:
+                ts = ad["created_at"] = ts.replace(tzinfo=UTC)
+            if ts > newest:
+                newest = ts
 
-                    max_created_at = max(ad["created_at"] for ad in ads)
-                    if max_created_at.tzinfo is None:
-                        max_created_at = max_created_at.replace(tzinfo=UTC)
-                    state.since = max_created_at
-                    print(f"[search_loop] обновлен since до {state.since!r}")
+        for chat_id, state in list(subscribers.items()):
+            # Выборка не покрывает объявления до cursor — иначе since
+            # сдвинулся бы на newest и они были бы потеряны
+            if state.since >= cursor:
+                enqueue_ads(chat_id, state, ads, newest)
 
-                await asyncio.sleep(CONFIG['check_interval'])
+        # Неполная страница — накопившиеся объявления выбраны полностью
+        if len(ads) < limit:
+            break
+        cursor = newest
 
-            except Exception as e:
-                print(f"[search_loop] ошибка в итерации для чата {chat_id}: {e}")
-                await asyncio.sleep(CONFIG['check_interval'])
 
-        print(f"[search_loop] выход из цикла для чата {chat_id}")
+async def dispatcher_loop():
+    """
+    Общий цикл фонового поиска новых объявлений для всех пользователей.
+    Раз в check_interval секунд выполняет dispatch_new_aparts, если есть
+    хотя бы один пользователь с активным поиском. Вместо отдельного
+    запроса к БД на каждого пользователя выполняется один общий.
+    Ожидание прерывается досрочно событием dispatcher_wakeup, поэтому
+    только что запущенный поиск не ждёт конца текущего интервала.
+    Сами сообщения отправляют обработчики sender_worker.
+    """
+    logger.info("[dispatcher] СТАРТ, интервал %ss", CONFIG['check_interval'])
 
-    except Exception as e:
-        print(f"[search_loop] критическая ошибка для чата {chat_id}: {e}")
+    while True:
         try:
-            await bot.send_message(
-                chat_id,
-                "Произошла критическая ошибка в поиске. Перезапустите поиск."
-            )
-        except Exception:
+            if subscribers:
+                await dispatch_new_aparts()
+        except Exception as e:
+            logger.exception("[dispatcher] ошибка в итерации: %s", e)
+
+        try:
+            await asyncio.wait_for(dispatcher_wakeup.wait(), timeout=CONFIG['check_interval'])
+        except asyncio.TimeoutError:
             pass
+        dispatcher_wakeup.clear()
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """
+    Запускает получение обновлений в режиме webhook: поднимает
+    aiohttp-сервер, принимающий обновления на пути ``/webhook``,
+    и регистрирует этот адрес в Telegram. Подлинность запросов
+    проверяется случайным secret_token, а токен бота не попадает
+    ни в URL, ни в логи доступа. Работает до остановки процесса.
+
+    :param bot: Экземпляр бота.
+    :type bot: Bot
+    :param dp: Диспетчер с зарегистрированными обработчиками.
+    :type dp: Dispatcher
+    """
+    path = "/webhook"
+    secret_token = secrets.token_urlsafe(32)
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret_token).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, port=CONFIG['webhook_port'])
+        await site.start()
+
+        await bot.set_webhook(
+            url=CONFIG['webhook_url'].rstrip("/") + path,
+            allowed_updates=dp.resolve_used_update_types(),
+            secret_token=secret_token,
+        )
+        logger.info("[bot] Webhook запущен на порту %s", CONFIG['webhook_port'])
+
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
 
 
 async def main():
     """
-    Точка входа бота: инициализирует БД, создаёт бота и диспетчер
-    и запускает long polling.
+    Точка входа бота: инициализирует БД, создаёт бота и диспетчер,
+    запускает общий цикл рассылки объявлений и получение обновлений
+    через long polling или webhook.
 
-    :raises RuntimeError: Если переменная окружения TELEGRAM_TOKEN не задана.
+    :raises RuntimeError: Если не задан TELEGRAM_TOKEN или WEBHOOK_URL
+        для режима webhook.
     """
     try:
         args = parse_arguments()
@@ -470,10 +789,18 @@ async def main():
         else:
             load_dotenv()
 
+        logging.basicConfig(
+            level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            format="%(asctime)s %(levelname)s %(message)s",
+        )
+
         CONFIG['token'] = args.token or os.getenv("TELEGRAM_TOKEN")
         CONFIG['db_url'] = args.db_url or os.getenv("DB_URL")
         CONFIG['check_interval'] = args.check_interval
         CONFIG['search_limit'] = args.search_limit
+        CONFIG['mode'] = args.mode or os.getenv("BOT_MODE", "polling")
+        CONFIG['webhook_url'] = args.webhook_url or os.getenv("WEBHOOK_URL")
+        CONFIG['webhook_port'] = args.webhook_port or int(os.getenv("WEBHOOK_PORT", "8080"))
 
         if args.db_url:
             os.environ["DB_URL"] = args.db_url
@@ -483,29 +810,55 @@ async def main():
                 "TELEGRAM_TOKEN не задан. Используйте --token или установите в .env файле"
             )
 
-        print(f"[bot] Инициализация с параметрами:")
-        print(f"  - Check interval: {CONFIG['check_interval']}s")
-        print(f"  - Search limit: {CONFIG['search_limit']}")
-        print(f"  - Env file: {args.env_file}")
+        if CONFIG['mode'] not in ("polling", "webhook"):
+            raise RuntimeError(f"Неизвестный режим BOT_MODE: {CONFIG['mode']}")
+
+        if CONFIG['mode'] == "webhook" and not CONFIG['webhook_url']:
+            raise RuntimeError(
+                "WEBHOOK_URL не задан. Используйте --webhook-url или установите в .env файле"
+            )
+
+        logger.info(
+            "[bot] Инициализация с параметрами: check interval=%ss, search limit=%s, mode=%s, env file=%s",
+            CONFIG['check_interval'], CONFIG['search_limit'], CONFIG['mode'], args.env_file,
+        )
 
         init_db()
-        print("[bot] База данных инициализирована")
+        logger.info("[bot] База данных инициализирована")
 
-        bot = Bot(token=CONFIG['token'])
+        # Превью ссылок на объявления не несут пользы и лишь замедляют доставку
+        bot = Bot(
+            token=CONFIG['token'],
+            default=DefaultBotProperties(link_preview_is_disabled=True),
+        )
         dp = Dispatcher()
 
         dp.message.register(cmd_start, Command("start"))
         dp.callback_query.register(
             on_callback,
-            F.data.in_({"set_price", "set_rooms", "start_search", "stop_search"}),
+            F.data.in_(_HANDLERS.keys()),
         )
         dp.message.register(on_message, F.text)
 
-        print("[bot] Запуск polling...")
-        await dp.start_polling(bot)
+        # Сильные ссылки на задачи: иначе сборщик мусора может удалить их на ходу
+        background = [asyncio.create_task(dispatcher_loop())]
+        background += [asyncio.create_task(sender_worker(bot)) for _ in range(SENDER_WORKERS)]
+
+        try:
+            if CONFIG['mode'] == "webhook":
+                await run_webhook(bot, dp)
+            else:
+                logger.info("[bot] Запуск polling...")
+                await bot.delete_webhook()
+                await dp.start_polling(bot, polling_timeout=30)
+        finally:
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            logger.info("[dispatcher] СТОП")
 
     except Exception as e:
-        print(f"[bot] Критическая ошибка: {e}")
+        logger.exception("[bot] Критическая ошибка: %s", e)
         raise RuntimeError(f"Не удалось запустить бота: {e}")
 
 
@@ -513,7 +866,7 @@ if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n[bot] Бот остановлен пользователем")
+        logger.info("[bot] Бот остановлен пользователем")
     except Exception as e:
-        print(f"\n[bot] Фатальная ошибка: {e}")
+        logger.error("[bot] Фатальная ошибка: %s", e)
         exit(1)
@@ -1,10 +1,12 @@
 import asyncio
 import re
 import os
+from collections import OrderedDict
 from dataclasses import dataclass
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+import soupsieve as sv
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright, Route
 from dotenv import load_dotenv
 from db import init_db, add_apart
 
@@ -13,7 +15,41 @@ load_dotenv()
 # Получаем URL из переменных окружения или параметров командной строки
 AVITO_URL = os.getenv("AVITO_URL",
                       "https://www.avito.ru/moskva/kvartiry/sdam/na_dlitelnyy_srok-ASgBAgICAkSSA8gQ8AeQUg?cd=1")
+AVITO_BASE_URL = "https://www.avito.ru"
 PARSE_INTERVAL = int(os.getenv("PARSE_INTERVAL", "300"))
+AVITO_PAGES = max(1, int(os.getenv("AVITO_PAGES", "1")))
+
+# Типы ресурсов, которые не загружаются в режиме без окна
+_BLOCKED_RESOURCES = frozenset({"image", "font", "media"})
+# Элементы страницы, удаляемые перед получением HTML
+_STRIP_DOM_JS = (
+    "document.querySelectorAll('script,style,svg,noscript,iframe')"
+    ".forEach(e => e.remove());"
+)
+# HEADLESS=0 открывает окно браузера, например для ручного прохождения капчи
+HEADLESS = os.getenv("HEADLESS", "1") != "0"
+
+# Регулярные выражения компилируются один раз при загрузке модуля
+_RE_SQUARES = re.compile(r"(\d+(?:[.,]\d+)?)\s*м²")
+_RE_ROOMS = re.compile(r"(\d+)[-\s]*к")
+_RE_FLOORS = re.compile(r"(\d+)\s*/\s*(\d+)")
+_RE_NUM = re.compile(r"(\d[\d\s]*)")
+_RE_INTS = re.compile(r"\d+")
+
+# CSS-селекторы компилируются один раз, а не на каждое объявление
+_SEL_ITEM = sv.compile("div[data-marker='item']")
+_SEL_TITLE = sv.compile("a[data-marker='item-title']")
+_SEL_PRICE = sv.compile("p[data-marker='item-price'] meta[itemprop='price']")
+_SEL_PARAMS = sv.compile("p[data-marker='item-specific-params']")
+_SEL_LOCATION = sv.compile("div[data-marker='item-location'] p")
+# При разборе страницы в дерево попадают только блоки объявлений
+_ONLY_ITEMS = SoupStrainer("div", attrs={"data-marker": "item"})
+
+# id объявлений, уже сохранённых этим процессом: при повторном разборе
+# выдачи они пропускаются до извлечения остальных полей. Хранится не более
+# SEEN_IDS_LIMIT id, давно не встречавшиеся вытесняются первыми
+SEEN_IDS_LIMIT = 10_000
+_seen_ids: OrderedDict[int, None] = OrderedDict()
 
 
 def in_digits(s: str) -> bool:
@@ -26,7 +62,7 @@ def in_digits(s: str) -> bool:
     :rtype: bool
     """
     try:
-        return all(ch.isdigit() for ch in s)
+        return s.isdigit()
     except (TypeError, AttributeError) as e:
         raise ValueError(f"Некорректный тип данных для проверки цифр: {e}")
 
@@ -45,14 +81,7 @@ def refactor_time_to_metro(time_to_metro: str) -> int:
     :rtype: int
     """
     try:
-        s = time_to_metro.replace("–", " ").split()
-        res = 0
-        for t in s:
-            if in_digits(t):
-                tdigit = int(t)
-                if tdigit > res:
-                    res = tdigit
-        return res
+        return max(map(int, _RE_INTS.findall(time_to_metro)), default=0)
     except Exception as e:
         print(f"[refactor_time_to_metro] Ошибка обработки '{time_to_metro}': {e}")
         return 0
@@ -82,7 +111,7 @@ def split_add(add: str) -> tuple[int, int]:
             if "без залога" in pl:
                 deposit = 0
             elif "залог" in pl:
-                m = re.search(r"(\d[\d\s]*)", p)
+                m = _RE_NUM.search(p)
                 if m:
                     num = m.group(1).replace(" ", "")
                     try:
@@ -93,7 +122,7 @@ def split_add(add: str) -> tuple[int, int]:
             if "без комиссии" in pl:
                 comission = 0
             elif "комис" in pl:
-                m = re.search(r"(\d[\d\s]*)", p)
+                m = _RE_NUM.search(p)
                 if m:
                     num = m.group(1).replace(" ", "")
                     try:
@@ -107,6 +136,22 @@ def split_add(add: str) -> tuple[int, int]:
         return 0, 0
 
 
+def title_rooms(title: str) -> int:
+    """
+    Определяет количество комнат по заголовку объявления.
+    Для студий возвращает 0, как и при отсутствии числа комнат.
+
+    :param title: Заголовок объявления Avito.
+    :type title: str
+    :returns: Количество комнат (0 = студия или не указано).
+    :rtype: int
+    """
+    if "студ" in title.lower():
+        return 0
+    m = _RE_ROOMS.search(title)
+    return int(m.group(1)) if m else 0
+
+
 def split_title(title: str) -> tuple[int, float, int, int]:
     """
     Разбирает заголовок объявления и извлекает количество комнат,
@@ -120,14 +165,13 @@ def split_title(title: str) -> tuple[int, float, int, int]:
     :rtype: tuple[int, float, int, int]
     """
     try:
-        title = title.replace("эт.", "").replace("этаж", "").replace("\u00A0", " ")
+        title = title.replace("\u00A0", " ")
         squares = 0.0
-        rooms = 0
         apart_floor = 0
         house_floor = 0
 
         # Площадь
-        m = re.search(r"(\d+(?:[.,]\d+)?)\s*м²", title)
+        m = _RE_SQUARES.search(title)
         if m:
             s = m.group(1).replace(",", ".")
             try:
@@ -136,18 +180,10 @@ def split_title(title: str) -> tuple[int, float, int, int]:
                 pass
 
         # Комнаты
-        if "студ" in title.lower():
-            rooms = 0
-        else:
-            m = re.search(r"(\d+)[-\s]*к", title)
-            if m:
-                try:
-                    rooms = int(m.group(1))
-                except ValueError:
-                    pass
+        rooms = title_rooms(title)
 
         # Этажи
-        m = re.search(r"(\d+)\s*\/\s*(\d+)", title)
+        m = _RE_FLOORS.search(title)
         if m:
             try:
                 apart_floor = int(m.group(1))
@@ -161,7 +197,7 @@ def split_title(title: str) -> tuple[int, float, int, int]:
         return 0, 0.0, 0, 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Ad:
     """
     Представляет одно объявление о сдаче квартиры с основными параметрами.
@@ -205,155 +241,367 @@ class Ad:
     time_to_metro: int
 
 
-async def fetch_html() -> str:
+async def launch_browser(p: Playwright) -> Browser:
+    """
+    Запускает браузер Chromium, который переиспользуется между итерациями
+    цикла парсинга. Режим без окна управляется переменной окружения HEADLESS.
+
+    :param p: Запущенный экземпляр Playwright.
+    :type p: Playwright
+    :returns: Запущенный браузер Chromium.
+    :rtype: Browser
+    :raises RuntimeError: Если браузер не удалось запустить.
+    """
+    try:
+        return await p.chromium.launch(headless=HEADLESS)
+    except Exception as e:
+        raise RuntimeError(f"Не удалось запустить браузер: {e}")
+
+
+async def _block_heavy_resources(route: Route):
     """
-    Загружает HTML страницы выдачи Avito с помощью Playwright.
-    Открывает браузер Chromium, переходит по AVITO_URL, ждёт загрузку и
-    возможное прохождение капчи, скроллит страницу вниз и возвращает HTML.
+    Обработчик запросов контекста: отменяет загрузку картинок, шрифтов
+    и медиа, остальные запросы пропускает без изменений.
 
+    :param route: Перехваченный запрос Playwright.
+    :type route: Route
+    """
+    if route.request.resource_type in _BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def page_urls(url: str, pages: int) -> list[str]:
+    """
+    Строит список URL страниц выдачи: первая страница — исходный URL,
+    последующие получают параметр ``p`` с номером страницы.
+
+    :param url: URL первой страницы выдачи.
+    :type url: str
+    :param pages: Количество страниц для загрузки.
+    :type pages: int
+    :returns: Список URL страниц выдачи.
+    :rtype: list[str]
+    """
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != "p"]
+    urls = [url]
+    for n in range(2, pages + 1):
+        urls.append(urlunsplit(parts._replace(query=urlencode(query + [("p", str(n))]))))
+    return urls
+
+
+async def fetch_one(context: BrowserContext, url: str) -> str:
+    """
+    Загружает HTML одной страницы выдачи Avito в отдельной вкладке.
+    Переходит по url, ждёт загрузку и возможное прохождение капчи,
+    скроллит страницу вниз, удаляет скрипты, стили, SVG и фреймы
+    и возвращает HTML.
+
+    :param context: Контекст браузера, в котором открывается вкладка.
+    :type context: BrowserContext
+    :param url: URL страницы выдачи.
+    :type url: str
     :returns: HTML-код страницы выдачи с объявлениями.
     :rtype: str
     :raises RuntimeError: При ошибках загрузки страницы.
     """
+    page = await context.new_page()
     try:
-        async with async_playwright() as p:
-            try:
-                browser = await p.chromium.launch(headless=False)
-            except Exception as e:
-                raise RuntimeError(f"Не удалось запустить браузер: {e}")
+        print("[playwright] открываю", url)
+        await page.goto(url, timeout=120_000)
 
-            try:
-                page = await browser.new_page(
-                    user_agent=(
-                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                        "AppleWebKit/605.1.15 (KHTML, like Gecko) "
-                        "Version/18.3.1 Safari/605.1.15"
-                    )
-                )
+        print("[playwright] жду 20 секунд для загрузки / капчи")
+        await page.wait_for_timeout(20_000)
 
-                print("[playwright] открываю", AVITO_URL)
-                await page.goto(AVITO_URL, timeout=120_000)
+        try:
+            await page.wait_for_selector("div[data-marker='item']", timeout=30_000)
+            print("[playwright] найден селектор item")
+        except Exception as e:
+            print("[playwright] не дождался item:", e)
 
-                print("[playwright] жду 20 секунд для загрузки / капчи")
-                await page.wait_for_timeout(20_000)
+        await page.evaluate("window.scrollBy(0, document.body.scrollHeight);")
+        await page.wait_for_timeout(2_000)
 
-                try:
-                    await page.wait_for_selector("div[data-marker='item']", timeout=30_000)
-                    print("[playwright] найден селектор item")
-                except Exception as e:
-                    print("[playwright] не дождался item:", e)
+        # Разметка, не нужная для разбора, удаляется до сериализации DOM
+        await page.evaluate(_STRIP_DOM_JS)
+        html = await page.content()
+        print("[playwright] длина html:", len(html))
 
-                await page.evaluate("window.scrollBy(0, document.body.scrollHeight);")
-                await page.wait_for_timeout(2_000)
+        return html
 
-                html = await page.content()
-                print("[playwright] длина html:", len(html))
+    except Exception as e:
+        raise RuntimeError(f"Ошибка при загрузке страницы {url}: {e}")
+    finally:
+        await page.close()
 
-                return html
 
-            except Exception as e:
-                raise RuntimeError(f"Ошибка при загрузке страницы: {e}")
-            finally:
-                await browser.close()
+async def fetch_all(context: BrowserContext, urls: list[str], max_parallel: int = 3) -> list[str]:
+    """
+    Параллельно загружает несколько страниц выдачи в одном контексте,
+    одновременно открывая не более max_parallel вкладок.
+    Страницы, которые не удалось загрузить, пропускаются.
+
+    :param context: Контекст браузера для открытия вкладок.
+    :type context: BrowserContext
+    :param urls: Список URL страниц выдачи.
+    :type urls: list[str]
+    :param max_parallel: Максимальное число одновременно открытых вкладок.
+    :type max_parallel: int
+    :returns: HTML-коды успешно загруженных страниц в порядке urls.
+    :rtype: list[str]
+    :raises RuntimeError: Если не удалось загрузить ни одной страницы.
+    """
+    sem = asyncio.Semaphore(max_parallel)
+
+    async def fetch_limited(url: str) -> str:
+        async with sem:
+            return await fetch_one(context, url)
+
+    results = await asyncio.gather(*(fetch_limited(u) for u in urls), return_exceptions=True)
+
+    htmls = []
+    for url, res in zip(urls, results):
+        if isinstance(res, Exception):
+            print(f"[playwright] страница {url} пропущена: {res}")
+        else:
+            htmls.append(res)
+
+    if not htmls:
+        raise RuntimeError("Не удалось загрузить ни одной страницы выдачи")
+    return htmls
+
+
+async def fetch_html(browser: Browser) -> list[str]:
+    """
+    Загружает HTML страниц выдачи Avito с помощью Playwright.
+    Создаёт в уже запущенном браузере новый контекст и параллельно
+    загружает AVITO_PAGES страниц, начиная с AVITO_URL. В режиме без окна
+    картинки, шрифты и медиа не загружаются.
+    Контекст закрывается после загрузки, браузер — нет.
+
+    :param browser: Запущенный браузер Chromium.
+    :type browser: Browser
+    :returns: HTML-коды загруженных страниц выдачи.
+    :rtype: list[str]
+    :raises RuntimeError: При ошибках загрузки страниц.
+    """
+    try:
+        try:
+            context = await browser.new_context(
+                user_agent=(
+                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                    "AppleWebKit/605.1.15 (KHTML, like Gecko) "
+                    "Version/18.3.1 Safari/605.1.15"
+                )
+            )
+        except Exception as e:
+            raise RuntimeError(f"Не удалось создать контекст браузера: {e}")
+
+        try:
+            if HEADLESS:
+                await context.route("**/*", _block_heavy_resources)
+            return await fetch_all(context, page_urls(AVITO_URL, AVITO_PAGES))
+        finally:
+            await context.close()
 
     except Exception as e:
         raise RuntimeError(f"Критическая ошибка fetch_html: {e}")
 
 
+def remember_id(ad_id: int):
+    """
+    Запоминает id сохранённого объявления, вытесняя самые давние id,
+    если их больше SEEN_IDS_LIMIT.
+
+    :param ad_id: Идентификатор объявления на Avito.
+    :type ad_id: int
+    """
+    _seen_ids[ad_id] = None
+    _seen_ids.move_to_end(ad_id)
+    if len(_seen_ids) > SEEN_IDS_LIMIT:
+        _seen_ids.popitem(last=False)
+
+
+def save_aparts(rows: list[dict]) -> int:
+    """
+    Сохраняет в БД объявления, собранные со страницы выдачи.
+    Единая точка записи: разбор страницы завершается до первого
+    обращения к базе, ошибка одной записи не прерывает остальные.
+
+    :param rows: Словари с ключами id, title, link, price, rooms.
+    :type rows: list[dict]
+    :returns: Количество успешно сохранённых объявлений.
+    :rtype: int
+    """
+    added = 0
+    for row in rows:
+        try:
+            add_apart(row)
+            remember_id(row["id"])
+            print(f"✓ added {row['id']} - {row['title']}")
+            added += 1
+        except Exception as e:
+            print(f"[parse] add_apart error {row['id']}: {e}")
+    return added
+
+
+def item_id(g: Tag) -> int | None:
+    """
+    Возвращает идентификатор объявления из атрибута ``data-item-id`` блока.
+
+    :param g: Блок объявления ``div[data-marker='item']``.
+    :type g: Tag
+    :returns: Идентификатор объявления, либо None, если атрибут некорректен.
+    :rtype: int | None
+    """
+    try:
+        return int(g.get("data-item-id", ""))
+    except (ValueError, TypeError):
+        return None
+
+
+def _extract_basics(g: Tag) -> tuple[str, str, int]:
+    """
+    Извлекает из блока объявления заголовок, полную ссылку и цену.
+
+    :param g: Блок объявления ``div[data-marker='item']``.
+    :type g: Tag
+    :returns: Кортеж (заголовок, ссылка, цена в рублях).
+    :rtype: tuple[str, str, int]
+    """
+    title_el = _SEL_TITLE.select_one(g)
+    title = title_el.get_text(strip=True) if title_el else ""
+
+    price_meta = _SEL_PRICE.select_one(g)
+    price_str = price_meta.get("content", "") if price_meta else "0"
+    try:
+        price = int(price_str)
+    except (ValueError, TypeError):
+        price = 0
+
+    link_el = g.find("a")
+    link = link_el.get("href", "") if link_el else ""
+    if link and not link.startswith("http"):
+        # Ссылки выдачи почти всегда относительны от корня сайта
+        if link.startswith("/") and not link.startswith("//"):
+            link = AVITO_BASE_URL + link
+        else:
+            link = urljoin(AVITO_BASE_URL, link)
+
+    return title, link, price
+
+
+def extract_row(g: Tag, int_id: int) -> dict:
+    """
+    Извлекает из блока объявления только поля, сохраняемые в таблицу aparts.
+    Залог, комиссия, площадь, этажи и метро не разбираются —
+    для полного разбора используется extract_ad.
+
+    :param g: Блок объявления ``div[data-marker='item']``.
+    :type g: Tag
+    :param int_id: Идентификатор объявления.
+    :type int_id: int
+    :returns: Словарь с ключами id, title, link, price, rooms.
+    :rtype: dict
+    """
+    title, link, price = _extract_basics(g)
+    rooms = title_rooms(title)
+    return {"id": int_id, "title": title, "link": link, "price": price, "rooms": rooms}
+
+
+def extract_ad(g: Tag) -> Ad | None:
+    """
+    Полностью разбирает блок объявления в объект Ad, включая поля,
+    которые не сохраняются в БД: залог, комиссию, площадь, этажи и метро.
+
+    :param g: Блок объявления ``div[data-marker='item']``.
+    :type g: Tag
+    :returns: Объявление, либо None, если у блока нет корректного id.
+    :rtype: Ad | None
+    """
+    int_id = item_id(g)
+    if int_id is None:
+        return None
+
+    title, link, price = _extract_basics(g)
+    rooms, squares, apart_floor, house_floor = split_title(title)
+
+    add_el = _SEL_PARAMS.select_one(g)
+    add_text = add_el.get_text(strip=True) if add_el else ""
+    deposit, comission = split_add(add_text)
+
+    metro = ""
+    time_to_metro = 0
+    loc_p = _SEL_LOCATION.select(g)
+    if len(loc_p) > 1:
+        spans = loc_p[1].find_all("span", limit=3)
+        if len(spans) > 1:
+            metro = spans[1].get_text(strip=True)
+        if len(spans) > 2:
+            time_to_metro = refactor_time_to_metro(
+                spans[2].get_text(strip=True)
+            )
+
+    return Ad(
+        id=int_id,
+        title=title,
+        link=link,
+        price=price,
+        comission=comission,
+        squares=squares,
+        apart_floor=apart_floor,
+        house_floor=house_floor,
+        rooms=rooms,
+        deposit=deposit,
+        metro=metro,
+        time_to_metro=time_to_metro,
+    )
+
+
 def parse_and_save(html: str):
     """
     Разбирает HTML страницы Avito, извлекает объявления и сохраняет их в БД.
-    Для каждого блока ``div[data-marker='item']`` формирует объект Ad,
-    берёт нужные поля и вызывает add_apart для сохранения в таблицу aparts.
+    Для каждого блока ``div[data-marker='item']`` функцией extract_row
+    извлекает только сохраняемые поля, собирает их со всей страницы и одним вызовом
+    save_aparts сохраняет их в таблицу aparts. Объявления, уже сохранённые
+    ранее этим процессом, пропускаются без разбора.
 
     :param html: HTML-код страницы выдачи Avito.
     :type html: str
     :raises ValueError: При ошибках парсинга HTML.
     """
     try:
-        soup = BeautifulSoup(html, "html.parser")
-        items = soup.select("div[data-marker='item']")
+        soup = BeautifulSoup(html, "lxml", parse_only=_ONLY_ITEMS)
+        items = _SEL_ITEM.select(soup)
         print("[parse] items:", len(items))
 
         if not items:
             raise ValueError("Не найдено ни одного объявления на странице")
 
-        added = 0
+        rows = []
+        skipped = 0
 
         for g in items:
             try:
-                id_attr = g.get("data-item-id", "")
-                try:
-                    int_id = int(id_attr)
-                except (ValueError, TypeError):
+                int_id = item_id(g)
+                if int_id is None:
                     continue
 
-                title_el = g.select_one("a[data-marker='item-title']")
-                title = title_el.get_text(strip=True) if title_el else ""
-
-                rooms, squares, apart_floor, house_floor = split_title(title)
-
-                price_meta = g.select_one("p[data-marker='item-price'] meta[itemprop='price']")
-                price_str = price_meta.get("content", "") if price_meta else "0"
-                try:
-                    price = int(price_str)
-                except (ValueError, TypeError):
-                    price = 0
-
-                add_el = g.select_one("p[data-marker='item-specific-params']")
-                add_text = add_el.get_text(strip=True) if add_el else ""
-                deposit, comission = split_add(add_text)
-
-                metro = ""
-                time_to_metro = 0
-                loc_p = g.select("div[data-marker='item-location'] p")
-                if len(loc_p) > 1:
-                    spans = loc_p[1].find_all("span")
-                    if len(spans) > 1:
-                        metro = spans[1].get_text(strip=True)
-                    if len(spans) > 2:
-                        time_to_metro = refactor_time_to_metro(
-                            spans[2].get_text(strip=True)
-                        )
-
-                link_el = g.find("a")
-                link = link_el.get("href", "") if link_el else ""
-                if link and not link.startswith("http"):
-                    link = urljoin("https://www.avito.ru", link)
-
-                ad = Ad(
-                    id=int_id,
-                    title=title,
-                    link=link,
-                    price=price,
-                    comission=comission,
-                    squares=squares,
-                    apart_floor=apart_floor,
-                    house_floor=house_floor,
-                    rooms=rooms,
-                    deposit=deposit,
-                    metro=metro,
-                    time_to_metro=time_to_metro,
-                )
+                if int_id in _seen_ids:
+                    _seen_ids.move_to_end(int_id)
+                    skipped += 1
+                    continue
 
-                try:
-                    add_apart({
-                        "id": ad.id,
-                        "title": ad.title,
-                        "link": ad.link,
-                        "price": ad.price,
-                        "rooms": ad.rooms,
-                    })
-                    print(f"✓ added {ad.id} - {ad.title}")
-                    added += 1
-                except Exception as e:
-                    print(f"[parse] add_apart error {ad.id}: {e}")
+                rows.append(extract_row(g, int_id))
 
             except Exception as e:
                 print(f"[parse] ошибка обработки объявления: {e}")
                 continue
 
-        print("[parse] total added:", added)
+        added = save_aparts(rows)
+        print("[parse] total added:", added, "already seen:", skipped)
 
     except Exception as e:
         raise ValueError(f"Критическая ошибка parse_and_save: {e}")
@@ -370,27 +618,45 @@ async def parse_loop():
     consecutive_errors = 0
     max_consecutive_errors = 5
 
-    while True:
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
         try:
-            print(f"[parser] Начало парсинга")
-            html = await fetch_html()
-            parse_and_save(html)
-            print(f"[parser] Парсинг завершён. Следующий запуск через {PARSE_INTERVAL} секунд")
-            consecutive_errors = 0
+            while True:
+                try:
+                    print(f"[parser] Начало парсинга")
+                    if not browser.is_connected():
+                        print("[playwright] браузер отключился, перезапускаю")
+                        browser = await launch_browser(p)
+                    htmls = await fetch_html(browser)
+                    loop = asyncio.get_running_loop()
+                    parsed = 0
+                    for html in htmls:
+                        try:
+                            # Разбор и запись в БД блокируют, поэтому выполняются в потоке
+                            await loop.run_in_executor(None, parse_and_save, html)
+                            parsed += 1
+                        except Exception as e:
+                            print(f"[parser] Ошибка разбора страницы: {e}")
+                    if not parsed:
+                        raise RuntimeError("Не удалось разобрать ни одной страницы выдачи")
+                    print(f"[parser] Парсинг завершён. Следующий запуск через {PARSE_INTERVAL} секунд")
+                    consecutive_errors = 0
 
-        except Exception as e:
-            consecutive_errors += 1
-            print(f"[parser] Ошибка при парсинге ({consecutive_errors}/{max_consecutive_errors}): {e}")
+                except Exception as e:
+                    consecutive_errors += 1
+                    print(f"[parser] Ошибка при парсинге ({consecutive_errors}/{max_consecutive_errors}): {e}")
 
-            if consecutive_errors >= max_consecutive_errors:
-                raise RuntimeError(
-                    f"Превышено максимальное количество последовательных ошибок ({max_consecutive_errors}). "
-                    "Парсер остановлен."
-                )
+                    if consecutive_errors >= max_consecutive_errors:
+                        raise RuntimeError(
+                            f"Превышено максимальное количество последовательных ошибок ({max_consecutive_errors}). "
+                            "Парсер остановлен."
+                        )
 
-            print(f"[parser] Повтор через {PARSE_INTERVAL} секунд")
+                    print(f"[parser] Повтор через {PARSE_INTERVAL} секунд")
 
-        await asyncio.sleep(PARSE_INTERVAL)
+                await asyncio.sleep(PARSE_INTERVAL)
+        finally:
+            await browser.close()
 
 
 async def main():
@@ -1,9 +1,21 @@
 
 # test.py
+import asyncio
 import pytest
-from bot import UserState, get_state, main_keyboard, stop_keyboard, user_states
+from datetime import datetime, UTC, timedelta
+from bs4 import BeautifulSoup
+import bot
+from bot import (
+    UserState, get_state, main_keyboard, stop_keyboard, matches_filters,
+    parse_price_range, parse_rooms, user_states, enqueue_ads, ready_chats,
+    dispatch_new_aparts, send_outbox,
+)
 from db import _parse_db_url
-from parser import in_digits, refactor_time_to_metro, split_add, split_title, Ad
+import parser
+from parser import (
+    in_digits, refactor_time_to_metro, split_add, split_title, title_rooms, page_urls,
+    remember_id, extract_row, extract_ad, Ad,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -16,10 +28,10 @@ def clear_states():
 # UserState
 def test_user_state_positive():
     """Положительный: создание с параметрами"""
-    state = UserState(min_price=30000, max_price=60000, rooms=[1, 2])
+    state = UserState(min_price=30000, max_price=60000, rooms=frozenset({1, 2}))
     assert state.min_price == 30000
     assert state.max_price == 60000
-    assert state.rooms == [1, 2]
+    assert state.rooms == frozenset({1, 2})
 
 
 def test_user_state_negative():
@@ -28,6 +40,7 @@ def test_user_state_negative():
     assert state.min_price is None
     assert state.rooms is None
     assert state.searching is False
+    assert state.outbox is None
 
 
 # get_state
@@ -47,10 +60,30 @@ def test_get_state_negative():
     assert state.min_price is None
 
 
+def test_get_state_eviction_positive(monkeypatch):
+    """Положительный: давнее состояние вытесняется при превышении лимита"""
+    monkeypatch.setattr(bot, "MAX_USER_STATES", 2)
+    get_state(1)
+    get_state(2)
+    get_state(1)
+    get_state(3)
+    assert list(user_states) == [1, 3]
+
+
+def test_get_state_eviction_negative(monkeypatch):
+    """Отрицательный: состояние с активным поиском не вытесняется"""
+    monkeypatch.setattr(bot, "MAX_USER_STATES", 2)
+    get_state(1).searching = True
+    get_state(2)
+    get_state(3)
+    assert 1 in user_states
+    assert 2 not in user_states
+
+
 # main_keyboard
 def test_main_keyboard_positive():
     """Положительный: клавиатура с фильтрами"""
-    state = UserState(min_price=30000, max_price=60000, rooms=[0, 1, 2])
+    state = UserState(min_price=30000, max_price=60000, rooms=frozenset({0, 1, 2}))
     kb = main_keyboard(state)
     text_price = kb.inline_keyboard[0][0].text
     text_rooms = kb.inline_keyboard[1][0].text
@@ -83,6 +116,198 @@ def test_stop_keyboard_negative():
     assert len(kb.inline_keyboard) != 0
     assert len(kb.inline_keyboard[0]) == 1
 
+# matches_filters
+def test_matches_filters_positive():
+    """Положительный: объявление подходит под фильтры"""
+    state = UserState(min_price=30000, max_price=60000, rooms=frozenset({1, 2}))
+    assert matches_filters(state, {"price": 45000, "rooms": 2}) is True
+    assert matches_filters(UserState(), {"price": 10, "rooms": 5}) is True
+
+
+def test_matches_filters_negative():
+    """Отрицательный: цена или комнаты вне фильтров"""
+    state = UserState(min_price=30000, max_price=60000, rooms=frozenset({1, 2}))
+    assert matches_filters(state, {"price": 20000, "rooms": 1}) is False
+    assert matches_filters(state, {"price": 70000, "rooms": 1}) is False
+    assert matches_filters(state, {"price": 45000, "rooms": 3}) is False
+
+# enqueue_ads
+def test_enqueue_ads_positive():
+    """Положительный: подходящее объявление попадает в очередь, since сдвигается"""
+    since, newest = datetime(2026, 1, 1, tzinfo=UTC), datetime(2026, 1, 2, tzinfo=UTC)
+    state = UserState(rooms=frozenset({2}), searching=True, since=since, outbox=asyncio.Queue())
+    ads = [
+        {"price": 40000, "rooms": 2, "created_at": newest},
+        {"price": 40000, "rooms": 3, "created_at": newest},
+    ]
+    enqueue_ads(1, state, ads, newest)
+    assert state.outbox.qsize() == 1
+    assert state.scheduled is True
+    assert ready_chats.get_nowait() == (1, state)
+    assert state.since == newest
+
+
+def test_enqueue_ads_negative():
+    """Отрицательный: старые объявления и переполненная очередь не ставят чат в ready_chats"""
+    since = datetime(2026, 1, 2, tzinfo=UTC)
+    state = UserState(searching=True, since=since, outbox=asyncio.Queue(maxsize=bot.OUTBOX_SIZE))
+    enqueue_ads(1, state, [{"price": 1, "rooms": 1, "created_at": since}], since)
+    assert state.outbox.empty()
+    assert state.scheduled is False
+
+    for _ in range(bot.OUTBOX_SIZE):
+        state.outbox.put_nowait({})
+    newest = datetime(2026, 1, 3, tzinfo=UTC)
+    enqueue_ads(1, state, [{"price": 1, "rooms": 1, "created_at": newest}], newest)
+    assert state.outbox.qsize() == bot.OUTBOX_SIZE
+    assert state.scheduled is False
+    assert ready_chats.empty()
+
+
+# dispatch_new_aparts
+T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _fake_get_new_aparts(db: list[dict], calls: list):
+    """Имитация get_new_aparts: выборка по since с ограничением limit"""
+    def get_new_aparts(min_price, max_price, rooms, since, limit):
+        calls.append(since)
+        return [dict(ad) for ad in db if ad["created_at"].replace(tzinfo=UTC) > since][:limit]
+    return get_new_aparts
+
+
+def test_dispatch_new_aparts_positive(monkeypatch):
+    """Положительный: полная страница, затем неполная; каждому чату — объявления после его since"""
+    db = [
+        {"price": 40000, "rooms": 1, "title": f"t{i}", "created_at": (T0 + timedelta(minutes=i)).replace(tzinfo=None)}
+        for i in range(1, 6)
+    ]
+    calls = []
+    early = UserState(searching=True, since=T0, outbox=asyncio.Queue())
+    late = UserState(searching=True, since=T0 + timedelta(minutes=3), outbox=asyncio.Queue())
+    monkeypatch.setattr(bot, "get_new_aparts", _fake_get_new_aparts(db, calls))
+    monkeypatch.setattr(bot, "subscribers", {1: early, 2: late})
+    monkeypatch.setattr(bot, "ready_chats", asyncio.Queue())
+    monkeypatch.setitem(bot.CONFIG, "search_limit", 3)
+
+    asyncio.run(dispatch_new_aparts())
+
+    assert calls == [T0, T0 + timedelta(minutes=3)]
+    assert [early.outbox.get_nowait()["title"] for _ in range(early.outbox.qsize())] == ["t1", "t2", "t3", "t4", "t5"]
+    assert [late.outbox.get_nowait()["title"] for _ in range(late.outbox.qsize())] == ["t4", "t5"]
+    assert early.since == late.since == T0 + timedelta(minutes=5)
+
+
+def test_dispatch_new_aparts_negative(monkeypatch):
+    """Отрицательный: новых объявлений нет — один запрос, очереди и since не меняются"""
+    calls = []
+    state = UserState(searching=True, since=T0, outbox=asyncio.Queue())
+    monkeypatch.setattr(bot, "get_new_aparts", _fake_get_new_aparts([], calls))
+    monkeypatch.setattr(bot, "subscribers", {1: state})
+    monkeypatch.setattr(bot, "ready_chats", asyncio.Queue())
+    monkeypatch.setitem(bot.CONFIG, "search_limit", 3)
+
+    asyncio.run(dispatch_new_aparts())
+
+    assert calls == [T0]
+    assert state.outbox.empty()
+    assert state.since == T0
+
+
+def test_dispatch_new_aparts_midquery_negative(monkeypatch):
+    """Отрицательный: чат, запустивший поиск во время запроса, не теряет более ранние объявления"""
+    db = [{"price": 40000, "rooms": 1, "title": "t1", "created_at": T0 + timedelta(minutes=5)}]
+    calls = []
+    late_since = T0 - timedelta(minutes=4)
+    joined = UserState(searching=True, since=late_since, outbox=asyncio.Queue())
+    fetch = _fake_get_new_aparts(db, calls)
+
+    def get_new_aparts(**kwargs):
+        # Поиск запускается, пока выполняется запрос к БД
+        bot.subscribers[2] = joined
+        return fetch(**kwargs)
+
+    monkeypatch.setattr(bot, "get_new_aparts", get_new_aparts)
+    monkeypatch.setattr(bot, "subscribers", {1: UserState(searching=True, since=T0, outbox=asyncio.Queue())})
+    monkeypatch.setattr(bot, "ready_chats", asyncio.Queue())
+    monkeypatch.setitem(bot.CONFIG, "search_limit", 3)
+
+    asyncio.run(dispatch_new_aparts())
+
+    assert joined.outbox.empty()
+    assert joined.since == late_since
+
+
+# send_outbox
+class _FakeBot:
+    """Записывает аргументы send_message вместо отправки в Telegram"""
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, kwargs))
+
+
+def _outbox(*titles: str) -> asyncio.Queue:
+    """Очередь outbox с объявлениями по заданным заголовкам"""
+    q = asyncio.Queue()
+    for title in titles:
+        q.put_nowait({"price": 40000, "rooms": 1, "title": title, "link": f"https://www.avito.ru/{title}"})
+    return q
+
+
+def test_send_outbox_positive():
+    """Положительный: сообщения по порядку, клавиатура остановки только у последнего"""
+    fake = _FakeBot()
+    state = UserState(searching=True, scheduled=True, outbox=_outbox("t1", "t2", "t3"))
+
+    asyncio.run(send_outbox(fake, 7, state))
+
+    assert [text.splitlines()[2] for _, text, _ in fake.sent] == ["t1", "t2", "t3"]
+    assert [kw for _, _, kw in fake.sent[:-1]] == [{"disable_notification": True}] * 2
+    assert fake.sent[-1][2] == {"reply_markup": stop_keyboard()}
+    assert state.outbox.empty()
+    assert state.scheduled is False
+
+
+def test_send_outbox_negative():
+    """Отрицательный: при остановленном поиске объявления отбрасываются без отправки"""
+    fake = _FakeBot()
+    state = UserState(searching=False, scheduled=True, outbox=_outbox("t1", "t2"))
+
+    asyncio.run(send_outbox(fake, 7, state))
+
+    assert fake.sent == []
+    assert state.outbox.empty()
+    assert state.scheduled is False
+
+# parse_price_range
+def test_parse_price_range_positive():
+    """Положительный: диапазон, только минимум, только максимум"""
+    assert parse_price_range("30000-60000") == (30000, 60000)
+    assert parse_price_range("30 000 - 60 000") == (30000, 60000)
+    assert parse_price_range("40000") == (40000, None)
+    assert parse_price_range("-60000") == (None, 60000)
+
+
+def test_parse_price_range_negative():
+    """Отрицательный: пустой или некорректный ввод"""
+    assert parse_price_range("") == (None, None)
+    assert parse_price_range("дорого") == (None, None)
+
+
+# parse_rooms
+def test_parse_rooms_positive():
+    """Положительный: список комнат через запятую"""
+    assert parse_rooms("0,1,2") == [0, 1, 2]
+    assert parse_rooms("2, 3") == [2, 3]
+
+
+def test_parse_rooms_negative():
+    """Отрицательный: нет чисел в вводе"""
+    assert parse_rooms("") == []
+    assert parse_rooms("студия") == []
+
 # _parse_db_url
 def test_parse_db_url_positive():
     """Положительный: корректный URL"""
@@ -110,6 +335,7 @@ def test_in_digits_negative():
     """Отрицательный: строка с нецифровыми символами"""
     assert in_digits("123abc") is False
     assert in_digits("12 34") is False
+    assert in_digits("") is False
 
 
 # refactor_time_to_metro
@@ -151,6 +377,109 @@ def test_split_title_negative():
     assert split_title("квартира") == (0, 0.0, 0, 0)
 
 
+# title_rooms
+def test_title_rooms_positive():
+    """Положительный: количество комнат из заголовка"""
+    assert title_rooms("3-к. квартира, 80 м², 2/5 эт.") == 3
+    assert title_rooms("Квартира-студия, 25 м²") == 0
+
+
+def test_title_rooms_negative():
+    """Отрицательный: в заголовке нет числа комнат"""
+    assert title_rooms("") == 0
+    assert title_rooms("квартира, 40 м²") == 0
+
+
+# page_urls
+def test_page_urls_positive():
+    """Положительный: номера страниц добавляются к параметрам запроса"""
+    urls = page_urls("https://www.avito.ru/moskva/kvartiry?cd=1", 3)
+    assert urls == [
+        "https://www.avito.ru/moskva/kvartiry?cd=1",
+        "https://www.avito.ru/moskva/kvartiry?cd=1&p=2",
+        "https://www.avito.ru/moskva/kvartiry?cd=1&p=3",
+    ]
+
+
+def test_page_urls_negative():
+    """Отрицательный: одна страница или некорректное количество"""
+    assert page_urls("https://www.avito.ru/moskva", 1) == ["https://www.avito.ru/moskva"]
+    assert page_urls("https://www.avito.ru/moskva", 0) == ["https://www.avito.ru/moskva"]
+
+
+# remember_id
+def test_remember_id_positive():
+    """Положительный: id запоминается"""
+    parser._seen_ids.clear()
+    remember_id(123)
+    assert 123 in parser._seen_ids
+    parser._seen_ids.clear()
+
+
+def test_remember_id_negative(monkeypatch):
+    """Отрицательный: давние id вытесняются при превышении лимита"""
+    parser._seen_ids.clear()
+    monkeypatch.setattr(parser, "SEEN_IDS_LIMIT", 2)
+    for ad_id in (1, 2, 3):
+        remember_id(ad_id)
+    assert 1 not in parser._seen_ids
+    assert list(parser._seen_ids) == [2, 3]
+    parser._seen_ids.clear()
+
+
+ITEM_HTML = """
+<div data-marker="item" data-item-id="42">
+  <a data-marker="item-title" href="/moskva/kvartiry/42">2-к. квартира, 54 м², 3/9 эт.</a>
+  <p data-marker="item-price"><meta itemprop="price" content="65000"></p>
+  <p data-marker="item-specific-params">Залог 65 000 ₽ · без комиссии</p>
+  <div data-marker="item-location">
+    <p>ул. Примерная, 1</p>
+    <p><span></span><span>Сокольники</span><span>6–10 мин.</span></p>
+  </div>
+</div>
+"""
+
+
+def _item(html: str):
+    return BeautifulSoup(html, "lxml").select_one("div[data-marker='item']")
+
+
+# extract_row
+def test_extract_row_positive():
+    """Положительный: извлекаются только сохраняемые поля"""
+    row = extract_row(_item(ITEM_HTML), 42)
+    assert row == {
+        "id": 42,
+        "title": "2-к. квартира, 54 м², 3/9 эт.",
+        "link": "https://www.avito.ru/moskva/kvartiry/42",
+        "price": 65000,
+        "rooms": 2,
+    }
+
+
+def test_extract_row_negative():
+    """Отрицательный: блок без заголовка, цены и ссылки"""
+    row = extract_row(_item('<div data-marker="item" data-item-id="1"></div>'), 1)
+    assert row == {"id": 1, "title": "", "link": "", "price": 0, "rooms": 0}
+
+
+# extract_ad
+def test_extract_ad_positive():
+    """Положительный: полный разбор блока объявления"""
+    ad = extract_ad(_item(ITEM_HTML))
+    assert ad.id == 42
+    assert ad.squares == 54.0
+    assert (ad.apart_floor, ad.house_floor) == (3, 9)
+    assert (ad.deposit, ad.comission) == (65000, 0)
+    assert ad.metro == "Сокольники"
+    assert ad.time_to_metro == 10
+
+
+def test_extract_ad_negative():
+    """Отрицательный: блок без корректного id"""
+    assert extract_ad(_item('<div data-marker="item" data-item-id="abc"></div>')) is None
+
+
 # Ad
 def test_ad_positive():
     """Положительный: создание объявления с данными"""
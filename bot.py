@@ -19,6 +19,8 @@ from dotenv import load_dotenv
 print(f"[bot] DB_URL: {os.getenv('DB_URL')}")
 print(f"[bot] TELEGRAM_TOKEN: {'установлен' if os.getenv('TELEGRAM_TOKEN') else 'НЕ установлен'}")
 
+PARSE_INTERVAL = int(os.getenv("PARSE_INTERVAL", "300"))
+
 @dataclass
 class UserState:
     """
@@ -370,11 +372,11 @@ async def search_loop(bot: Bot, chat_id: int):
                     state.since = max_created_at
                     print(f"[search_loop] обновлен since до {state.since!r}")
 
-                await asyncio.sleep(int(os.getenv("PARSE_INTERVAL", "300")))
+                await asyncio.sleep(PARSE_INTERVAL)
 
             except Exception as e:
                 print(f"[search_loop] ошибка в итерации для чата {chat_id}: {e}")
-                await asyncio.sleep(int(os.getenv("PARSE_INTERVAL", "300")))
+                await asyncio.sleep(PARSE_INTERVAL)
 
         print(f"[search_loop] выход из цикла для чата {chat_id}")
 